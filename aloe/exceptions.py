@@ -2,8 +2,6 @@
 Exception classes
 """
 
-from aloe.utils import PY3
-
 
 class AloeSyntaxError(SyntaxError):
     """A syntax error in a feature file."""
@@ -39,13 +37,6 @@ class NoDefinitionFound(Exception):
         super().__init__('The step r"%s" is not defined' % self.step.sentence)
 
 
-# Step definitions can contain Unicode, and that will propagate to the
-# exception message. On Python 2, this makes handling such exceptions tricky,
-# so force encoding the message as Unicode.
-if not PY3:
-    NoDefinitionFound.__str__ = lambda self: self.message.encode("utf-8")
-
-
 def undefined_step(step, *args, **kwargs):
     """
     A fallback step used when no suitable step definition was found.
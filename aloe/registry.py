@@ -3,9 +3,11 @@
 Registry of steps and hooks called when running scenarios.
 """
 
+import inspect
 import re
+from bisect import insort
 from collections import OrderedDict
-from functools import wraps, partial
+from functools import lru_cache, wraps, partial
 
 from aloe.codegen import multi_manager
 from aloe.exceptions import undefined_step, StepLoadingError
@@ -20,6 +22,33 @@ HOOK_WHAT = ("all", "feature", "example", "step")
 HOOK_WHEN = ("before", "after", "around")
 
 
+# Flags all the step sentences are compiled with
+STEP_FLAGS = re.I | re.U
+
+
+@lru_cache(maxsize=4096)
+def _compile_step_pattern(sentence):
+    """
+    Compile a step sentence, anchoring it at the end.
+
+    The same sentences are registered again, e.g. when step modules are
+    reloaded, so share the compiled patterns.
+    """
+    if not sentence.endswith("$"):
+        sentence += "$"
+    return re.compile(sentence, STEP_FLAGS)
+
+
+UNDERSCORE_TO_SPACE = str.maketrans("_", " ")
+
+
+@lru_cache(maxsize=2048)
+def _default_sentence(name):
+    """Make a step sentence from a function name."""
+    sentence = name.translate(UNDERSCORE_TO_SPACE)
+    return sentence[:1].upper() + sentence[1:]
+
+
 class PriorityClass(object):
     """
     Priority class constants.
@@ -34,16 +63,54 @@ class PriorityClass(object):
     # the order is reversed
 
 
+class PriorityCallbacks(object):
+    """
+    Callbacks for a particular situation, grouped by priority.
+    """
+
+    def __init__(self):
+        # Kept sorted as the priorities are added
+        self.priorities = []
+        self.by_priority = {}
+
+    def with_priority(self, priority):
+        """
+        Get the callbacks with the given priority, adding the priority if
+        needed.
+        """
+        try:
+            return self.by_priority[priority]
+        except KeyError:
+            insort(self.priorities, priority)
+            funcs = self.by_priority[priority] = OrderedDict()
+            return funcs
+
+    def __iter__(self):
+        """Iterate over all the callbacks, sorted by priority."""
+        for priority in self.priorities:
+            yield from self.by_priority[priority].values()
+
+
 class CallbackDict(dict):
     """
-    A collection of callbacks for all situations.
+    A collection of callbacks for all situations, keyed by (what, when).
     """
 
     def __init__(self):
         """
         Initialize the callback lists for every kind of situation.
         """
-        super().__init__({what: {when: {} for when in HOOK_WHEN} for what in HOOK_WHAT})
+        super().__init__({(what, when): PriorityCallbacks() for what in HOOK_WHAT for when in HOOK_WHEN})
+
+        # Hook lists by (what, when), and collected hooks by what; cleared
+        # every time the callbacks change
+        self._cache = {}
+
+    def _changed(self):
+        """
+        Record a change to the callbacks, dropping the now stale hook lists.
+        """
+        self._cache.clear()
 
     @classmethod
     def _function_id(cls, func):
@@ -52,17 +119,21 @@ class CallbackDict(dict):
         twice.
 
         To support dynamically generated functions, take the variables from
-        the function closure into account.
+        the function closure into account. These are compared by identity:
+        they might not be hashable, and converting them to strings can be
+        expensive.
         """
 
         func = unwrap_function(func)
 
-        return (
-            func.__code__.co_filename,
-            func.__code__.co_firstlineno,
-            # variables in the closure might not be hashable
-            tuple(str(c.cell_contents) for c in func.__closure__ or ()),
-        )
+        closure = func.__closure__
+        if closure is None:
+            closure_id = ()
+        else:
+            closure_id = tuple((type(c.cell_contents).__name__, id(c.cell_contents)) for c in closure)
+
+        code = func.__code__
+        return (code.co_filename, code.co_firstlineno, closure_id)
 
     # pylint:disable=too-many-arguments
     def append_to(self, what, when, function, name=None, priority=0):
@@ -72,10 +143,12 @@ class CallbackDict(dict):
         if name is None:
             name = self._function_id(function)
 
-        funcs = self[what][when].setdefault(priority, OrderedDict())
+        funcs = self[what, when].with_priority(priority)
         funcs.pop(name, None)
         funcs[name] = function
 
+        self._changed()
+
     # pylint:enable=too-many-arguments
 
     def clear(self, name=None, priority_class=None):
@@ -84,41 +157,74 @@ class CallbackDict(dict):
         If name is given, only remove callbacks with given name.
         If a priority class is given, only remove ones with the given class.
         """
-        for what_dict in self.values():
-            for when_dict in what_dict.values():
-                if priority_class is None:
-                    action_values = when_dict.values()
+        for callbacks in self.values():
+            if priority_class is None:
+                action_values = callbacks.by_priority.values()
+            else:
+                action_values = (value for (pc, _), value in callbacks.by_priority.items() if pc == priority_class)
+            for callback_list in action_values:
+                if name is None:
+                    callback_list.clear()
                 else:
-                    action_values = (value for (pc, _), value in when_dict.items() if pc == priority_class)
-                for callback_list in action_values:
-                    if name is None:
-                        callback_list.clear()
-                    else:
-                        callback_list.pop(name, None)
+                    callback_list.pop(name, None)
+
+        self._changed()
 
     def hook_list(self, what, when):
         """
         Get all the hooks for a certain event, sorted appropriately.
         """
-        return tuple(
-            func for priority in sorted(self[what][when].keys()) for func in self[what][when][priority].values()
-        )
+        key = (what, when)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
 
-    def wrap(self, what, function, *hook_args, **hook_kwargs):
+        hooks = tuple(self[what, when])
+        self._cache[key] = hooks
+        return hooks
+
+    def _hooks(self, what):
         """
-        Return a function that executes all the callbacks in proper relations
-        to the given test part.
+        Get the before and after hooks for a certain event, the after hooks
+        in reverse, and a context manager combining all the around hooks; or
+        an empty tuple if there are no hooks for the event.
         """
+        key = what
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
 
         before_hooks = self.hook_list(what, "before")
         around_hooks = self.hook_list(what, "around")
         after_hooks = self.hook_list(what, "after")
 
-        multi_hook = multi_manager(*around_hooks)
+        if before_hooks or around_hooks or after_hooks:
+            hooks = (before_hooks, after_hooks, after_hooks[::-1], multi_manager(*around_hooks))
+        else:
+            hooks = ()
+        self._cache[key] = hooks
+        return hooks
+
+    def wrap(self, what, function, *hook_args, **hook_kwargs):
+        """
+        Return a function that executes all the callbacks in proper relations
+        to the given test part.
+        """
+
+        # The hooks are only collected when first called, if at all
+        hooks = [None]
 
         @wraps(function)
         def wrapped(*args, **kwargs):
             """Run all the hooks in proper relations to the event."""
+            if hooks[0] is None:
+                hooks[0] = self._hooks(what)
+            if not hooks[0]:
+                return function(*args, **kwargs)
+            before_hooks, _, reversed_after_hooks, multi_hook = hooks[0]
+
             for before_hook in before_hooks:
                 before_hook(*hook_args, **hook_kwargs)
 
@@ -127,7 +233,7 @@ class CallbackDict(dict):
                     return function(*args, **kwargs)
             finally:
                 # 'after' hooks still run after an exception
-                for after_hook in reversed(after_hooks):
+                for after_hook in reversed_after_hooks:
                     after_hook(*hook_args, **hook_kwargs)
 
         return wrapped
@@ -137,17 +243,20 @@ class CallbackDict(dict):
         Return a pair of functions to execute before and after the event.
         """
 
-        before_hooks = self.hook_list(what, "before")
-        around_hooks = self.hook_list(what, "around")
-        after_hooks = self.hook_list(what, "after")
-
-        multi_hook = multi_manager(*around_hooks)
+        # The hooks are only collected when first called, if at all
+        hooks = [None]
 
         # Save in a closure for both functions
         around_hook = [None]
 
         def before_func(*args, **kwargs):
             """All hooks to be called before the event."""
+            if hooks[0] is None:
+                hooks[0] = self._hooks(what)
+            if not hooks[0]:
+                return
+            before_hooks, _, _, multi_hook = hooks[0]
+
             for before_hook in before_hooks:
                 before_hook(*args, **kwargs)
 
@@ -156,6 +265,10 @@ class CallbackDict(dict):
 
         def after_func(*args, **kwargs):
             """All hooks to be called after the event."""
+            if not hooks[0]:
+                return
+            _, after_hooks, _, _ = hooks[0]
+
             around_hook[0].__exit__(None, None, None)
             around_hook[0] = None
 
@@ -171,13 +284,28 @@ class StepDict(object):
     """
 
     def __init__(self):
-        self.steps = dict()
+        # The step patterns and their functions in registration order, and the
+        # position of every pattern in them
+        self._patterns = []
+        self._searchers = []
+        self._funcs = []
+        self._index = {}
 
     def load(self, sentence, func):
         """Add a mapping between a step sentence and a function."""
 
         step_re = self._assert_is_step(sentence, func)
-        self.steps[step_re.pattern] = (step_re, func)
+
+        index = self._index.get(step_re.pattern)
+        if index is None:
+            self._index[step_re.pattern] = len(self._patterns)
+            self._patterns.append(step_re)
+            self._searchers.append(step_re.search)
+            self._funcs.append(func)
+        else:
+            self._patterns[index] = step_re
+            self._searchers[index] = step_re.search
+            self._funcs[index] = func
 
         try:
             func.sentence = sentence
@@ -189,27 +317,50 @@ class StepDict(object):
 
         return func
 
+    def _remove(self, sentences):
+        """Remove the mappings for the given step sentences."""
+
+        for sentence in sentences:
+            del self._index[sentence]
+
+        keep = sorted(self._index.values())
+        self._patterns = [self._patterns[index] for index in keep]
+        self._searchers = [self._searchers[index] for index in keep]
+        self._funcs = [self._funcs[index] for index in keep]
+        self._index = {regex.pattern: index for index, regex in enumerate(self._patterns)}
+
     def unload(self, sentence):
         """Remove a mapping for a given step sentence, if it exists."""
-        try:
-            del self.steps[sentence]
-        except KeyError:
-            pass
+        if sentence in self._index:
+            self._remove((sentence,))
 
     def unload_func(self, func):
         """Remove any mappings for a given function."""
 
-        sentences_to_remove = list(sentence for sentence, (_, step_func) in self.steps.items() if step_func == func)
-        for sentence in sentences_to_remove:
-            del self.steps[sentence]
+        sentences_to_remove = list(sentence for sentence, index in self._index.items() if self._funcs[index] == func)
+        if sentences_to_remove:
+            self._remove(sentences_to_remove)
 
     def clear(self):
         """Remove all registered steps."""
-        self.steps.clear()
+        self._patterns = []
+        self._searchers = []
+        self._funcs = []
+        self._index = {}
 
     def __len__(self):
         """Number of registered step sentences."""
-        return len(self.steps)
+        return len(self._index)
+
+    @property
+    def steps(self):
+        """
+        A mapping of the registered step patterns to tuples of their
+        compiled regular expression and function.
+
+        This is a copy; use load and unload to change the steps.
+        """
+        return {regex.pattern: (regex, func) for regex, func in zip(self._patterns, self._funcs)}
 
     def load_func(self, func):
         """Load a step from a function."""
@@ -218,10 +369,12 @@ class StepDict(object):
 
     def load_steps(self, obj):
         """Load steps from an object."""
-        exclude = getattr(obj, "exclude", [])
+        exclude = set(getattr(obj, "exclude", ()))
         for attr in dir(obj):
-            if self._attr_is_step(attr, obj) and attr not in exclude:
-                step_method = getattr(obj, attr)
+            if attr[0] == "_" or attr in exclude:
+                continue
+            step_method = getattr(obj, attr)
+            if self._is_func_or_method(step_method):
                 self.load_func(step_method)
         return obj
 
@@ -230,16 +383,13 @@ class StepDict(object):
         func = getattr(func, "__func__", func)
         sentence = getattr(func, "__doc__", None)
         if sentence is None:
-            sentence = func.__name__.replace("_", " ")
-            sentence = sentence[0].upper() + sentence[1:]
+            sentence = _default_sentence(func.__name__)
         return sentence
 
     def _assert_is_step(self, sentence, func):
         """Compile a step definition or raise an error."""
         try:
-            if not sentence.endswith("$"):
-                sentence += "$"
-            return re.compile(sentence, re.I | re.U)
+            return _compile_step_pattern(sentence)
         except re.error as exc:
             raise StepLoadingError(
                 "Error when trying to compile:\n"
@@ -248,14 +398,27 @@ class StepDict(object):
                 "  error: %s" % (sentence, func, exc)
             )
 
-    def _attr_is_step(self, attr, obj):
-        """Test whether an object's attribute is a step."""
-        return attr[0] != "_" and self._is_func_or_method(getattr(obj, attr))
-
     def _is_func_or_method(self, func):
         """Test whether an object is a function or a method."""
-        func_dir = dir(func)
-        return callable(func) and ("func_name" in func_dir or "__func__" in func_dir)
+        return inspect.ismethod(func)
+
+    def _search_steps(self, sentence):
+        """
+        Find the last registered step matching the sentence. The match must
+        start before the end of the sentence.
+
+        Returns a tuple of (function, match) or (None, None) if no step
+        matches.
+        """
+
+        sentence_end = len(sentence)
+
+        for search, func in zip(reversed(self._searchers), reversed(self._funcs)):
+            matched = search(sentence)
+            if matched and matched.start(0) < sentence_end:
+                return (func, matched)
+
+        return (None, None)
 
     def match_step(self, step_):
         """
@@ -265,22 +428,12 @@ class StepDict(object):
         """
         # strip the first word which will be Given, Then, When or And
         # sentence = step_.sentence.split(' ', 1)[1]
-        matched = None
-        matched_func = None
-        matched_pos = len(step_.sentence)
-
-        for regex, func in self.steps.values():
-            new_match = regex.search(step_.sentence)
-            if new_match:
-                pos = new_match.start(0)
-                if pos < matched_pos:
-                    matched = new_match
-                    matched_func = func
+        matched_func, matched = self._search_steps(step_.sentence)
 
         if matched:
             kwargs = matched.groupdict()
             if kwargs:
-                return (matched_func, (), matched.groupdict())
+                return (matched_func, (), kwargs)
             else:
                 args = matched.groups()
                 return (matched_func, args, {})
@@ -368,10 +521,6 @@ class StepDict(object):
         removes all the step definitions that are associated with it.
         """
 
-        if isinstance(step_func_or_sentence, bytes):
-            # Python 2 strings, convert to str
-            step_func_or_sentence = step_func_or_sentence.decode()
-
         if isinstance(step_func_or_sentence, str):
             return lambda func: self.load(step_func_or_sentence, func)
         else:
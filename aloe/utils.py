@@ -2,55 +2,11 @@
 Miscellaneous utilities used internally by Aloe.
 """
 
-import io
 import re
-import sys
 import inspect
 
 from functools import lru_cache
-from contextlib import contextmanager
-
-
-@contextmanager
-def dummy_cm():
-    """A dummy context manager to compare other decorated functions to."""
-    pass
-
-
-PY3 = sys.version_info >= (3, 0)
-
-
-def identifier(value):
-    """
-    Make a valid identifier from a string on either Python 2 or Python 3.
-
-    Python 2 limits identifiers to ASCII characters, so unicode must be
-    encoded.
-    """
-
-    if PY3:
-        return value
-    else:
-        return value.encode("unicode_escape")
-
-
-if PY3:
-    StreamTestWrapperIO = io.StringIO  # pylint:disable=invalid-name
-else:
-
-    class StreamTestWrapperIO(io.StringIO):
-        """A wrapper for capturing Nose output in tests."""
-
-        def write(self, str_):
-            """
-            Write a string to the stream. In case of Python 2, accept both str
-            and unicode.
-            """
-
-            try:
-                super().write(str_)
-            except TypeError:
-                super().write(str_.decode("utf-8"))
+from weakref import WeakValueDictionary
 
 
 def unwrap_function(func):
@@ -59,21 +15,7 @@ def unwrap_function(func):
     function.
     """
 
-    if hasattr(func, "__wrapped__"):
-        return func.__wrapped__
-
-    # In Python 2, functools.wraps doesn't set __wrapped__, however, it is
-    # possible to check whether the function has been wrapped by a known
-    # method, in this case contextlib.contextmanager
-    elif (
-        func.__code__.co_filename == dummy_cm.__code__.co_filename
-        and func.__code__.co_firstlineno == dummy_cm.__code__.co_firstlineno
-    ):
-        # Get the original function from the closure
-        return func.__closure__[0].cell_contents
-
-    else:
-        return func
+    return getattr(func, "__wrapped__", func)
 
 
 RE_CAMEL_CASE = re.compile(r"(((?<=[a-z])[A-Z])|([A-Z](?![A-Z]|$)))")
@@ -110,26 +52,55 @@ class memoizedproperty(object):  # pylint:disable=invalid-name
 
 class memoizedtype(type):  # pylint:disable=invalid-name
     """
-    A type that caches the created instances.
+    A type that caches the created instances, for as long as they are in use.
     """
 
-    @lru_cache(20)
+    # Instances by their class and constructor arguments
+    _instances = WeakValueDictionary()
+
     def __call__(cls, *args, **kwargs):
-        # On Python 2, newsuper can't deal with metaclasses
-        return super(memoizedtype, cls).__call__(*args, **kwargs)
+        key = (cls, args, tuple(sorted(kwargs.items())))
+
+        try:
+            return memoizedtype._instances[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable arguments can't be cached
+            return super().__call__(*args, **kwargs)
+
+        instance = super().__call__(*args, **kwargs)
+        try:
+            memoizedtype._instances[key] = instance
+        except TypeError:
+            # The instance can't be weakly referenced
+            pass
+        return instance
+
+
+@lru_cache(maxsize=1024)
+def _cached_args(func):
+    """Get the argument names for a hashable function."""
+    return _get_args(func)
+
+
+def _get_args(func):
+    """Get the argument names for a function."""
+    params = inspect.signature(func).parameters.values()
+    return tuple(param.name for param in params if param.kind == param.POSITIONAL_OR_KEYWORD)
 
 
 def get_args(func):
-    """Get a list of argument names for a function.
-    This is a wrapper around inspect.getargspec/inspect.signature because
-    getargspec got deprecated in Python 3.5 and signature isn't available on
-    Python 2.
+    """Get the argument names for a function.
+    This is a wrapper around inspect.signature caching the result, as
+    computing the signature is slow and the same steps are inspected
+    repeatedly.
     :param func: The function to inspect.
-    :return: A list of argument names.
-    :rtype: list
+    :return: A tuple of argument names.
+    :rtype: tuple
     """
-    if hasattr(inspect, "signature"):
-        params = inspect.signature(func).parameters.values()
-        return [param.name for param in params if param.kind == param.POSITIONAL_OR_KEYWORD]
-    else:
-        return inspect.getargspec(func).args
+    try:
+        return _cached_args(func)
+    except TypeError:
+        # The function isn't hashable
+        return _get_args(func)
@@ -3,6 +3,7 @@
 Basic scenario tests.
 """
 
+import io
 import sys
 from inspect import getsourcefile
 
@@ -13,7 +14,6 @@ from tests.testing import (
     FeatureTest,
     in_directory,
 )
-from aloe.utils import PY3, StreamTestWrapperIO
 
 
 @in_directory('tests/simple_app')
@@ -63,7 +63,7 @@ class SimpleScenarioTest(FeatureTest):
         Check that the appropriate error messages are printed on failure.
         """
 
-        stream = StreamTestWrapperIO()
+        stream = io.StringIO()
 
         failing_feature = 'features/wrong_expectations.feature'
 
@@ -90,7 +90,7 @@ E       AssertionError: assert 30.0 == 40.0
         step background.
         """
 
-        stream = StreamTestWrapperIO()
+        stream = io.StringIO()
 
         failing_feature = 'features/wrong_expectations_background.feature'
 
@@ -116,7 +116,7 @@ E       AssertionError: assert 30.0 == 40.0
         Test that a failing feature in Chinese fails tests.
         """
 
-        stream = StreamTestWrapperIO()
+        stream = io.StringIO()
 
         failing_feature = 'features/wrong_expectations_zh.feature'
 
@@ -126,21 +126,13 @@ E       AssertionError: assert 30.0 == 40.0
 
         output = stream.getvalue()
 
-        if PY3:
-            feature_stack_frame = f"""
+        feature_stack_frame = f"""
 >       那么结果应该是40
 
 {failing_feature}:12:
 """.strip()
 
-            self.assertIn(feature_stack_frame, output)
-        else:
-            # Cannot use non-ASCII method names in Python 2
-            feature_stack_frame = f"""
-{failing_feature}:12:
-            """
-
-            self.assertIn(feature_stack_frame, output)
+        self.assertIn(feature_stack_frame, output)
 
 
         step_stack_frame = """
@@ -155,7 +147,7 @@ E       AssertionError: assert 30.0 == 40.0
         Check the behavior when a step is not defined.
         """
 
-        stream = StreamTestWrapperIO()
+        stream = io.StringIO()
 
         failing_feature = 'features/step_not_found.feature'
 
@@ -173,7 +165,7 @@ E       AssertionError: assert 30.0 == 40.0
         Check the behavior when a step is not defined with a Chinese feature.
         """
 
-        stream = StreamTestWrapperIO()
+        stream = io.StringIO()
 
         failing_feature = 'features/step_not_found_zh.feature'
 
@@ -206,7 +198,7 @@ E       AssertionError: assert 30.0 == 40.0
         scenario outline.
         """
 
-        stream = StreamTestWrapperIO()
+        stream = io.StringIO()
 
         failing_feature = 'features/wrong_expectations.feature'
 
@@ -19,21 +19,9 @@ from aloe.registry import (
     PriorityClass,
     STEP_REGISTRY,
 )
-from aloe.utils import PY3, StreamTestWrapperIO
 
-# When the outer Nose captures output, it's a different type between Python 2
-# and 3.
-if PY3:
-    CAPTURED_OUTPUTS = (io.StringIO,)
-else:
-    # io.StringIO is an alias to cStringIO.StringIO, which is a function and
-    # not a type
-    import StringIO  # pylint:disable=import-error
-
-    CAPTURED_OUTPUTS = (
-        type(io.StringIO()),
-        StringIO.StringIO,
-    )
+# The type of output captured by the outer Nose
+CAPTURED_OUTPUTS = (io.StringIO,)
 
 
 def in_directory(directory):
@@ -153,7 +141,7 @@ class FeatureTest(unittest.TestCase):
 
         if stream is None:
             # redirects output
-            stream = StreamTestWrapperIO()
+            stream = io.StringIO()
 
         # Reset the state of callbacks and steps so that individual tests don't
         # affect each other
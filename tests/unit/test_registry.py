@@ -6,7 +6,13 @@ Test step and callback registry.
 import unittest
 import pytest
 
-from aloe.registry import CallbackDecorator, CallbackDict, PriorityClass, StepDict
+from aloe.registry import (
+    _compile_step_pattern,
+    CallbackDecorator,
+    CallbackDict,
+    PriorityClass,
+    StepDict,
+)
 from aloe.exceptions import StepLoadingError, undefined_step
 
 from tests.utils import appender, before_after
@@ -96,6 +102,28 @@ def test_replacing_step():
         assert_matches(steps, sentence(num), (func2, (), {}))
 
 
+def test_reloading_step_reuses_pattern():
+    """
+    Test that registering the same sentence again doesn't compile it again.
+    """
+
+    def func():  # pylint:disable=missing-docstring
+        pass
+
+    steps = StepDict()
+
+    _compile_step_pattern.cache_clear()
+
+    steps.load("a reloaded step", func)
+    steps.load("a reloaded step", func)
+
+    cache_info = _compile_step_pattern.cache_info()
+
+    assert cache_info.misses == 1
+    assert cache_info.hits == 1
+    assert_matches(steps, "a reloaded step", (func, (), {}))
+
+
 def test_StepDict_load_a_step_return_the_given_function():
     """
     aloe.STEP_REGISTRY.load(step, func) returns func
@@ -174,6 +202,27 @@ def test_StepDict_can_load_steps_from_an_object():
     assert_matches(steps, "Doing something", (step_list.step_2, (), {}))
 
 
+def test_StepDict_can_exclude_builtin_methods_when_load_steps():
+    """
+    aloe.STEP_REGISTRY.load_steps(obj) don't load obj builtin methods in
+    STEP_REGISTRY
+    """
+    steps = StepDict()
+
+    class DictSteps(dict):
+        """A dictionary defining a step."""
+
+        def step_1(self):  # pylint:disable=missing-docstring
+            pass
+
+    step_list = DictSteps()
+    steps.load_steps(step_list)
+
+    assert len(steps) == 1
+    assert_matches(steps, "Step 1", (step_list.step_1, (), {}))
+    assert_no_match(steps, "Keys")
+
+
 def test_StepDict_can_exclude_methods_when_load_steps():
     """
     aloe.STEP_REGISTRY.load_steps(obj) don't load exluded attr in
@@ -260,6 +309,120 @@ def test_unload_reload():
     assert_matches(steps, "My step 1", (step, ("1",), {}))
 
 
+def test_unload_sentence():
+    """
+    Test unloading a single step sentence.
+    """
+
+    def func1():
+        """First function to register as a step."""
+        pass
+
+    def func2():
+        """Second function to register as a step."""
+        pass
+
+    steps = StepDict()
+
+    steps.load("First step", func1)
+    steps.load("Second step", func2)
+    steps.load("Third step", func1)
+
+    steps.unload("Second step$")
+
+    assert len(steps) == 2
+    assert {pattern: func for pattern, (_, func) in steps.steps.items()} == {
+        "First step$": func1,
+        "Third step$": func1,
+    }
+    assert_no_match(steps, "Second step")
+    assert_matches(steps, "First step", (func1, (), {}))
+    assert_matches(steps, "Third step", (func1, (), {}))
+
+    # Should be a no-op
+    steps.unload("Second step$")
+
+    assert len(steps) == 2
+
+
+def test_last_registered_match():
+    """
+    Test that the last registered step matching the sentence is chosen.
+    """
+
+    def func1():
+        """First function to register as a step."""
+        pass
+
+    def func2():
+        """Second function to register as a step."""
+        pass
+
+    steps = StepDict()
+
+    steps.load(r"I have (\d+) apples?", func1)
+    steps.load(r"(\d+) apples?", func2)
+
+    assert_matches(steps, "I have 3 apples", (func2, ("3",), {}))
+    assert_matches(steps, "3 apples", (func2, ("3",), {}))
+
+
+def test_match_at_end_of_sentence():
+    """
+    Test that steps only matching at the end of the sentence aren't chosen.
+    """
+
+    def func():  # pylint:disable=missing-docstring
+        pass
+
+    steps = StepDict()
+
+    steps.load(r"x?", func)
+
+    assert_no_match(steps, "abc")
+    assert_no_match(steps, "")
+    assert_matches(steps, "x", (func, (), {}))
+
+
+def test_match_steps_with_groups():
+    """
+    Test matching steps sharing group names or using back references.
+    """
+
+    def func1():
+        """First function to register as a step."""
+        pass
+
+    def func2():
+        """Second function to register as a step."""
+        pass
+
+    def func3():
+        """Third function to register as a step."""
+        pass
+
+    steps = StepDict()
+
+    steps.load(r"I have (?P<count>\d+) apples", func1)
+    steps.load(r"I give away (?P<count>\d+) apples", func2)
+
+    assert_matches(steps, "I have 3 apples", (func1, (), {"count": "3"}))
+    assert_matches(steps, "I give away 2 apples", (func2, (), {"count": "2"}))
+
+    steps.load(r"(\w+) is (\w+) and \1", func3)
+
+    assert_matches(steps, "I have 3 apples", (func1, (), {"count": "3"}))
+    assert_matches(steps, "red is red and red", (func3, ("red", "red"), {}))
+    assert_no_match(steps, "red is red and blue")
+
+    # The last registered step matching wins, and can't match at the end
+    steps.load(r"(?P<count>\d+) apples", func3)
+    steps.load(r"x?", func2)
+
+    assert_matches(steps, "I have 3 apples", (func3, (), {"count": "3"}))
+    assert_no_match(steps, "abc")
+
+
 class CallbackDictTest(unittest.TestCase):
     """
     Test callback dictionary.
@@ -338,6 +501,80 @@ class CallbackDictTest(unittest.TestCase):
             ],
         )
 
+    def test_hooks_added_later(self):
+        """
+        Test that hooks added after wrapping apply to the next wrapping.
+        """
+
+        sequence = []
+
+        self.before.all(appender(sequence, "before1"))
+
+        self.callbacks.wrap("all", appender(sequence, "wrapped"))()
+
+        self.before.all(appender(sequence, "before2"))
+
+        self.callbacks.wrap("all", appender(sequence, "wrapped"))()
+
+        self.callbacks.clear()
+
+        self.callbacks.wrap("all", appender(sequence, "wrapped"))()
+
+        self.assertEqual(
+            [item for (item,) in sequence],
+            ["before1", "wrapped", "before1", "before2", "wrapped", "wrapped"],
+        )
+
+    def test_hooks_added_before_call(self):
+        """
+        Test that hooks added after wrapping, but before the wrapped function
+        is called, are run.
+        """
+
+        sequence = []
+
+        wrap = self.callbacks.wrap("all", appender(sequence, "wrapped"))
+        before, after = self.callbacks.before_after("all")
+
+        self.before.all(appender(sequence, "before"))
+        self.after.all(appender(sequence, "after"))
+
+        wrap()
+        before()
+        after()
+
+        self.assertEqual(
+            [item for (item,) in sequence],
+            ["before", "wrapped", "after", "before", "after"],
+        )
+
+    def test_same_hook_added_twice(self):
+        """
+        Test that adding the same hook again replaces it.
+        """
+
+        sequence = []
+
+        def make_hook(value):
+            """Make a hook appending the given value."""
+
+            def hook():
+                """Append the value to the sequence."""
+                sequence.append(value)
+
+            return hook
+
+        first = make_hook([1])
+        self.before.all(first)
+        self.before.all(first)
+
+        # Equal, but not the same, closure variables make a different hook
+        self.before.all(make_hook([1]))
+
+        self.callbacks.wrap("all", lambda: None)()
+
+        self.assertEqual(sequence, [[1], [1]])
+
     @staticmethod
     def before_after_hook(sequence, when):
         """A before/after hook appending to a sequence."""
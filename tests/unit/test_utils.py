@@ -2,13 +2,14 @@
 Test utility functions.
 """
 
-import sys
+import gc
 import unittest
 
 from contextlib import contextmanager
 from functools import wraps
 
 from aloe.utils import (
+    get_args,
     unwrap_function,
     memoizedproperty,
     memoizedtype,
@@ -33,12 +34,6 @@ class UnwrapTest(unittest.TestCase):
     def test_wraps(self):
         """Test unwrapping a function from a decorator using wraps."""
 
-        if sys.version_info < (3, 0):
-            # In Python 2, functools doesn't set enough information on the
-            # wrapped function
-            raise unittest.SkipTest(
-                "Cannot unwrap @wraps in general case on Python 2.")
-
         @wraps(my_function)
         def decorated():
             """A decorated function."""
@@ -55,6 +50,36 @@ class UnwrapTest(unittest.TestCase):
         )
 
 
+class GetArgsTest(unittest.TestCase):
+    """
+    Test getting function arguments.
+    """
+
+    def test_get_args(self):
+        """Test getting the arguments of a function."""
+
+        def func(self, first, second=None, *args, keyword=None, **kwargs):
+            """A function with all kinds of arguments."""
+            pass  # pragma: no cover
+
+        self.assertEqual(get_args(func), ("self", "first", "second"))
+        # The result is cached
+        self.assertIs(get_args(func), get_args(func))
+
+    def test_unhashable(self):
+        """Test getting the arguments of an unhashable callable."""
+
+        class Unhashable(object):  # pylint:disable=too-few-public-methods
+            """An unhashable callable."""
+
+            __hash__ = None
+
+            def __call__(self, value):
+                pass  # pragma: no cover
+
+        self.assertEqual(get_args(Unhashable()), ("value",))
+
+
 class MemoizedTest(unittest.TestCase):
     """Test memoization functions."""
 
@@ -122,3 +147,13 @@ class MemoizedTest(unittest.TestCase):
 
         # Only two objects should have been created
         self.assertEqual(Memoized.counter, 2)
+
+        # Objects are only cached while in use
+        del first, another_first
+        gc.collect()
+
+        Memoized(5)
+        self.assertEqual(Memoized.counter, 3)
+
+        # Unhashable arguments aren't cached
+        self.assertIsNot(Memoized([5]), Memoized([5]))